@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+from aiohttp import web
+
+import testing_bot
+
+DEFAULT_MIX = 'search=4,coordinates=4,sell=2,discover=1,followers=1'
+LAG_SAMPLE_SECONDS = 0.01
+LOAD_TEST_PREFIX = 'loadtest'
+
+class FakeUser:
+    """
+    Stand-in for the discord.User attached to an interaction.
+    """
+    def __init__(self, name):
+        self.name = name
+
+class FakeResponse:
+    """
+    Stand-in for discord.InteractionResponse that records what the handler sent.
+    """
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, content=None, **kwargs):
+        self.messages.append(content)
+
+class FakeInteraction:
+    """
+    Stand-in for the discord.Interaction that the gateway hands to a command callback.
+    """
+    def __init__(self, user_name):
+        self.user = FakeUser(user_name)
+        self.response = FakeResponse()
+
+# Function to start a local mock of the Twitch users and follows endpoints
+async def start_mock_twitch_api(latency):
+    """
+    Starts a local aiohttp server that answers the Twitch endpoints used by the bot.
+
+    Args:
+        latency (float): Seconds to wait before answering each request.
+
+    Returns:
+        tuple: The aiohttp runner and the base URL the server is listening on.
+    """
+    async def users(request):
+        await asyncio.sleep(latency)
+        login = request.query.get('login', '')
+        return web.json_response({'data': [{'id': str(abs(hash(login)) % 100000000), 'login': login}]})
+
+    async def follows(request):
+        await asyncio.sleep(latency)
+        return web.json_response({'total': 1234, 'data': [{'followed_at': '2023-01-01T00:00:00Z'}]})
+
+    app = web.Application()
+    app.router.add_get('/helix/users', users)
+    app.router.add_get('/helix/users/follows', follows)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f'http://127.0.0.1:{port}/helix'
+
+# Function to parse a traffic mix such as "search=4,sell=1"
+def parse_mix(mix_str):
+    """
+    Parses a comma separated traffic mix into command weights.
+
+    Args:
+        mix_str (str): The mix, e.g. "search=4,coordinates=4,sell=2".
+
+    Returns:
+        dict: Command names mapped to their relative weights.
+    """
+    mix = {}
+    for part in mix_str.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in COMMAND_ARGS:
+            raise ValueError(f'Unsupported command in mix: {name}')
+        mix[name] = int(weight or 1)
+    return mix
+
+def _search_args(rng, n):
+    return {'item': rng.choice(['oak logs', 'obsidian', 'diamond', 'spruce', 'glass'])}
+
+def _coordinates_args(rng, n):
+    return {'location': rng.choice(['bee farm', 'cactus farm', 'nowhere'])}
+
+def _sell_args(rng, n):
+    return {'item': f'{LOAD_TEST_PREFIX} item {n}', 'quantity': rng.randint(1, 64), 'price': rng.randint(0, 50)}
+
+def _discover_args(rng, n):
+    return {
+        'location': f'{LOAD_TEST_PREFIX} location {n}',
+        'dimension': 'overworld',
+        'x': str(rng.randint(-1000, 1000)),
+        'y': str(rng.randint(-64, 319)),
+        'z': str(rng.randint(-1000, 1000)),
+    }
+
+def _followers_args(rng, n):
+    return {}
+
+def _locations_args(rng, n):
+    return {'dimension': rng.choice(['all', 'nether', 'overworld'])}
+
+COMMAND_ARGS = {
+    'search': _search_args,
+    'coordinates': _coordinates_args,
+    'sell': _sell_args,
+    'discover': _discover_args,
+    'followers': _followers_args,
+    'locations': _locations_args,
+}
+
+# Function to synthesise a list of gateway events
+def synthesize_events(mix, count, users, seed):
+    """
+    Builds a random sequence of command invocations following the given mix.
+
+    Args:
+        mix (dict): Command names mapped to their relative weights.
+        count (int): The number of events to generate.
+        users (int): The number of distinct fake users sending commands.
+        seed (int): Seed for the random generator so runs are repeatable.
+
+    Returns:
+        list: Events as dictionaries with 'command', 'user' and 'args' keys.
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    events = []
+    for n in range(count):
+        command = rng.choices(names, weights)[0]
+        events.append({
+            'command': command,
+            'user': f'{LOAD_TEST_PREFIX}_user_{rng.randrange(users)}',
+            'args': COMMAND_ARGS[command](rng, n),
+        })
+    return events
+
+# Function to read a recorded list of gateway events
+def read_replay_events(path):
+    """
+    Reads recorded events from a JSON lines file.
+
+    Args:
+        path (str): Path to a file with one {"command", "user", "args"} object per line.
+
+    Returns:
+        list: The recorded events.
+    """
+    with open(path, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def monitor_event_loop_lag(samples, stop):
+    """
+    Measures how late the event loop wakes up a task that sleeps for a fixed interval.
+
+    Args:
+        samples (list): List that lag measurements (in seconds) are appended to.
+        stop (asyncio.Event): Set when the monitor should exit.
+    """
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + LAG_SAMPLE_SECONDS
+        await asyncio.sleep(LAG_SAMPLE_SECONDS)
+        samples.append(max(0.0, loop.time() - expected))
+
+async def dispatch(event, results):
+    """
+    Delivers one event to the matching command callback in the bot's command tree.
+
+    Args:
+        event (dict): The event to deliver.
+        results (list): List that (command, latency, error, interaction) tuples are appended to.
+    """
+    command = testing_bot.bot.tree.get_command(event['command'])
+    interaction = FakeInteraction(event['user'])
+    error = None
+    started = time.perf_counter()
+    try:
+        await command.callback(interaction, **event['args'])
+    except Exception as e:
+        error = e
+    results.append((event['command'], time.perf_counter() - started, error, interaction))
+
+async def run_gateway(events, concurrency):
+    """
+    Feeds events to the command tree with at most <concurrency> handlers in flight.
+
+    Args:
+        events (list): The events to deliver, in order.
+        concurrency (int): The maximum number of concurrently running handlers.
+
+    Returns:
+        tuple: The per-event results, the event loop lag samples and the wall clock duration.
+    """
+    queue = asyncio.Queue()
+    for event in events:
+        queue.put_nowait(event)
+
+    results = []
+    lag_samples = []
+    stop = asyncio.Event()
+
+    async def worker():
+        while True:
+            try:
+                event = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await dispatch(event, results)
+
+    monitor = asyncio.create_task(monitor_event_loop_lag(lag_samples, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    return results, lag_samples, elapsed
+
+def count_lost_writes(results):
+    """
+    Compares the writes the handlers acknowledged with what actually reached the JSON files.
+
+    Args:
+        results (list): The per-event results from run_gateway.
+
+    Returns:
+        dict: Lost write counts for 'sell' and 'discover'.
+    """
+    acknowledged_sells = Counter()
+    acknowledged_locations = set()
+    for command, _, error, interaction in results:
+        if error or not interaction.response.messages:
+            continue
+        message = interaction.response.messages[0] or ''
+        if command == 'sell' and message.startswith('Successfully added'):
+            acknowledged_sells[interaction.user.name.lower()] += 1
+        elif command == 'discover' and message.startswith('Location') and 'added to' in message:
+            acknowledged_locations.add(message.split(' added to ')[0][len('Location '):].lower())
+
+    shop_data = testing_bot.read_shop_data()
+    stored_sells = Counter({user: len(items) for user, items in shop_data.items() if user in acknowledged_sells})
+    coords_data = testing_bot.read_coordinates_data()
+    stored_locations = {name for locations in coords_data.values() for name in locations}
+
+    return {
+        'sell': sum((acknowledged_sells - stored_sells).values()),
+        'discover': len(acknowledged_locations - stored_locations),
+    }
+
+def print_report(results, lag_samples, elapsed, lost):
+    latencies = [latency for _, latency, _, _ in results]
+    errors = Counter(command for command, _, error, _ in results if error)
+    print(f'Events: {len(results)} in {elapsed:.2f}s ({len(results) / elapsed if elapsed else 0:.1f} events/s)')
+    print(f'Latency ms : p50 {percentile(latencies, 50) * 1000:.2f} | p95 {percentile(latencies, 95) * 1000:.2f} | '
+          f'p99 {percentile(latencies, 99) * 1000:.2f} | max {max(latencies, default=0) * 1000:.2f}')
+    print(f'Loop lag ms : p50 {percentile(lag_samples, 50) * 1000:.2f} | p99 {percentile(lag_samples, 99) * 1000:.2f} | '
+          f'max {max(lag_samples, default=0) * 1000:.2f}')
+
+    by_command = {}
+    for command, latency, _, _ in results:
+        by_command.setdefault(command, []).append(latency)
+    for command, samples in sorted(by_command.items()):
+        print(f'\t/{command}: {len(samples)} calls, p95 {percentile(samples, 95) * 1000:.2f} ms, {errors[command]} errors')
+
+    print(f'Lost writes : {lost["sell"]} /sell, {lost["discover"]} /discover')
+
+async def main(args):
+    if args.replay:
+        events = read_replay_events(os.path.abspath(args.replay))
+    else:
+        events = synthesize_events(parse_mix(args.mix), args.events, args.users, args.seed)
+
+    # Work on copies of the data files so a load test never touches the live database
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    work_dir = tempfile.mkdtemp(prefix='noodle-load-')
+    for file_name in (testing_bot.COORDS_FILE, testing_bot.SHOP_FILE):
+        source = os.path.join(source_dir, file_name)
+        if os.path.exists(source):
+            shutil.copy(source, work_dir)
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+
+    runner, base_url = await start_mock_twitch_api(args.twitch_latency)
+    testing_bot.TWITCH_USERS_URL = f'{base_url}/users'
+    testing_bot.TWITCH_FOLLOWS_URL = f'{base_url}/users/follows'
+
+    try:
+        results, lag_samples, elapsed = await run_gateway(events, args.concurrency)
+        lost = count_lost_writes(results)
+        print_report(results, lag_samples, elapsed, lost)
+    finally:
+        await runner.cleanup()
+        os.chdir(previous_dir)
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            print(f'Data files kept in {work_dir}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drives the NoodleBot command tree with simulated gateway traffic.')
+    parser.add_argument('--events', type=int, default=1000, help='Number of synthetic events to send.')
+    parser.add_argument('--concurrency', type=int, default=50, help='Maximum number of handlers in flight.')
+    parser.add_argument('--users', type=int, default=20, help='Number of distinct fake users.')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weighted command mix (default: {DEFAULT_MIX}).')
+    parser.add_argument('--replay', help='JSON lines file of recorded events to send instead of synthetic traffic.')
+    parser.add_argument('--twitch-latency', type=float, default=0.05, help='Seconds the mock Twitch API waits per request.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic traffic.')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary data files after the run.')
+    asyncio.run(main(parser.parse_args()))
@@ -8,10 +8,12 @@
 #
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import asyncio
 import subprocess
 from datetime import datetime, timedelta
+import world_backup
+import server_health
 
 TOKEN = 'ENTER DISCORD TOKEN'
 COMMAND_COOLDOWN_SECONDS = 120  # 2 minutes
@@ -25,12 +27,35 @@ AUTHORIZED_ROLE_ID = 1234567890
 
 last_command_time = None  # Variable to store the timestamp of the last command execution
 
+# World backups
+SERVER_DIR = '/path/to'
+WORLD_DIRS = ['world', 'world_nether', 'world_the_end']
+BACKUP_DIR = '/path/to/backups'
+BACKUP_INTERVAL_HOURS = 6
+BACKUPS_TO_KEEP = 28
+BACKUP_WORKERS = None  # None uses one worker per CPU
+SAVE_FLUSH_WAIT_SECONDS = 10
+
+backup_lock = asyncio.Lock()  # Stops backups and restores from overlapping
+
+# Server health monitoring
+SERVER_LOG_FILE = '/path/to/logs/latest.log'
+HEALTH_ALERT_CHANNEL_ID = 1234567890
+HEALTH_POLL_SECONDS = 60  # How often the server is asked for its TPS and MSPT
+
+health = server_health.ServerHealth()
+
+minecraft_process = None  # The server process started by /start
+
 async def start_minecraft_server():
+    global minecraft_process
     try:
-        proc = await asyncio.create_subprocess_exec(
+        minecraft_process = await asyncio.create_subprocess_exec(
             'java', '-Xmx1G', '-Xms1G', '-jar', '/path/to/paper.jar', 'nogui',
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            # Console commands are written to stdin; the output is followed through logs/latest.log instead
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
         )
         return True
     except subprocess.SubprocessError as e:
@@ -53,6 +78,81 @@ async def stop_minecraft_server():
         print(f"Error stopping the server: {e}")
         return False
 
+def is_own_server_running():
+    return minecraft_process is not None and minecraft_process.returncode is None
+
+async def send_server_command(command):
+    try:
+        if is_own_server_running():
+            minecraft_process.stdin.write(f'{command}\n'.encode())
+            await minecraft_process.stdin.drain()
+            return True
+
+        proc = await asyncio.create_subprocess_exec(
+            'screen', '-S', 'minecraft_server', '-X', 'stuff', f'{command}^M',
+        )
+        return await proc.wait() == 0
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Error sending '{command}' to the server: {e}")
+        return False
+
+async def is_minecraft_server_running():
+    """
+    Checks for the server started by /start and for a screen session named minecraft_server.
+
+    Returns:
+        bool: False only if neither is running; True if either is, or if screen cannot be checked.
+    """
+    if is_own_server_running():
+        return True
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            'screen', '-ls', 'minecraft_server',
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return await proc.wait() == 0
+    except (OSError, subprocess.SubprocessError) as e:
+        # Assume the server is up rather than touching the worlds under it
+        print(f"Error checking whether the server is running: {e}")
+        return True
+
+async def backup_world(keep=None):
+    """
+    Snapshots the worlds into the backup store, optionally pruning old backups afterwards.
+
+    World saving is paused while the changed files are streamed into the store;
+    unchanged files are not read, so the pause follows the amount of changed data.
+
+    Args:
+        keep (int or None): Number of backups to keep after this one, or None to skip pruning.
+
+    Returns:
+        dict: Statistics about the snapshot from world_backup.create_snapshot.
+    """
+    loop = asyncio.get_running_loop()
+    async with backup_lock:
+        server_running = await is_minecraft_server_running()
+        if server_running and not await send_server_command('save-off'):
+            raise RuntimeError('Could not pause world saving')
+        try:
+            if server_running:
+                await send_server_command('save-all flush')
+                await asyncio.sleep(SAVE_FLUSH_WAIT_SECONDS)
+            result = await loop.run_in_executor(
+                None, world_backup.create_snapshot, BACKUP_DIR, SERVER_DIR, WORLD_DIRS, BACKUP_WORKERS
+            )
+        finally:
+            if server_running:
+                await send_server_command('save-on')
+
+        if keep is not None:
+            await loop.run_in_executor(None, world_backup.prune_snapshots, BACKUP_DIR, keep)
+        return result
+
+def has_server_role(ctx):
+    return AUTHORIZED_ROLE_ID in [role.id for role in ctx.author.roles]
+
 def can_execute_command(ctx):
     global last_command_time
     if not AUTHORIZED_ROLE_ID in [role.id for role in ctx.author.roles]:
@@ -70,6 +170,12 @@ def can_execute_command(ctx):
 async def on_ready():
     print(f'Bot is online! Logged in as {bot.user.name} ({bot.user.id})')
     await bot.change_presence(activity=discord.Game(name='Server is OFF'))
+    if not scheduled_backup.is_running():
+        scheduled_backup.start()
+    if not poll_server_health.is_running():
+        poll_server_health.start()
+    if not hasattr(bot, 'log_monitor'):
+        bot.log_monitor = asyncio.create_task(server_health.monitor_server_log(SERVER_LOG_FILE, health, send_health_alert))
     try:
         await bot.sync_commands()
         print("Commands synced with Discord")
@@ -110,4 +216,116 @@ async def update_package(ctx):
             await ctx.send('Error updating the spigot-geyser package.')
             print(f"Error updating the spigot-geyser package: {e}")
 
-bot.run(TOKEN)
+def format_size(num_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if num_bytes < 1024 or unit == 'GB':
+            return f'{num_bytes:.1f} {unit}'
+        num_bytes /= 1024
+
+@tasks.loop(hours=BACKUP_INTERVAL_HOURS)
+async def scheduled_backup():
+    try:
+        result = await backup_world(keep=BACKUPS_TO_KEEP)
+        print(f"Scheduled backup {result['id']} stored {format_size(result['stored_bytes'])}")
+    except Exception as e:
+        print(f"Error during scheduled backup: {e}")
+
+@scheduled_backup.before_loop
+async def wait_for_first_backup():
+    # tasks.loop runs straight away; wait a full interval so starting the bot does not trigger a backup
+    await bot.wait_until_ready()
+    await asyncio.sleep(BACKUP_INTERVAL_HOURS * 3600)
+
+@bot.slash_command(name="backup", description="Backs up the Minecraft worlds.")
+async def backup(ctx):
+    if not has_server_role(ctx):
+        await ctx.send('You do not have permission to back up the server.')
+        return
+    if backup_lock.locked():
+        await ctx.send('A backup or restore is already running.')
+        return
+
+    await ctx.send('Backup started...')
+    try:
+        result = await backup_world()
+    except Exception as e:
+        await ctx.send('Error backing up the server.')
+        print(f"Error backing up the server: {e}")
+        return
+
+    await ctx.send(
+        f"Backup {result['id']} done: {result['changed_files']}/{result['files']} files changed, "
+        f"{format_size(result['stored_bytes'])} stored for {format_size(result['total_bytes'])} of world data."
+    )
+
+@bot.slash_command(name="backups", description="Lists the world backups.")
+async def list_backups(ctx):
+    snapshots = world_backup.list_snapshots(BACKUP_DIR)
+    if not snapshots:
+        await ctx.send('No backups found.')
+        return
+    await ctx.send('Backups:\n\t' + '\n\t'.join(reversed(snapshots)))
+
+@bot.slash_command(name="prune", description="Deletes old world backups.")
+async def prune_backups(ctx, keep: int = BACKUPS_TO_KEEP):
+    if not has_server_role(ctx):
+        await ctx.send('You do not have permission to prune backups.')
+        return
+    if keep < 1:
+        await ctx.send('At least one backup must be kept.')
+        return
+
+    async with backup_lock:
+        loop = asyncio.get_running_loop()
+        removed, deleted_chunks = await loop.run_in_executor(None, world_backup.prune_snapshots, BACKUP_DIR, keep)
+    await ctx.send(f'Removed {len(removed)} backups and {deleted_chunks} unused chunks.')
+
+@bot.slash_command(name="restore", description="Restores the Minecraft worlds from a backup.")
+async def restore(ctx, snapshot: str):
+    if not has_server_role(ctx):
+        await ctx.send('You do not have permission to restore the server.')
+        return
+    async with backup_lock:
+        if snapshot not in world_backup.list_snapshots(BACKUP_DIR):
+            await ctx.send(f'Backup {snapshot} not found.')
+            return
+        if await is_minecraft_server_running():
+            await ctx.send('Stop the server before restoring a backup.')
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            restored = await loop.run_in_executor(None, world_backup.restore_snapshot, BACKUP_DIR, snapshot, SERVER_DIR)
+        except Exception as e:
+            await ctx.send('Error restoring the backup.')
+            print(f"Error restoring backup {snapshot}: {e}")
+            return
+        if not restored:
+            await ctx.send(f'Backup {snapshot} not found.')
+            return
+    await ctx.send(f'Backup {snapshot} restored. The previous worlds were kept as <world>.before-restore.')
+
+async def send_health_alert(message):
+    channel = bot.get_channel(HEALTH_ALERT_CHANNEL_ID)
+    if channel is None:
+        print(f"Health alert channel not found: {message}")
+        return
+    try:
+        await channel.send(message)
+    except Exception as e:
+        print(f"Error sending health alert: {e}")
+
+@tasks.loop(seconds=HEALTH_POLL_SECONDS)
+async def poll_server_health():
+    # Paper prints the answers to the console, where the log monitor picks them up.
+    # 'list' also catches players who were online before the monitor started.
+    if await is_minecraft_server_running():
+        await send_server_command('tps')
+        await send_server_command('mspt')
+        await send_server_command('list')
+
+@bot.slash_command(name="health", description="Shows the Minecraft server's TPS, lag spikes and online players.")
+async def server_health_report(ctx):
+    await ctx.send(health.summary())
+
+if __name__ == '__main__':
+    bot.run(TOKEN)
@@ -0,0 +1,282 @@
+import asyncio
+import os
+import re
+import time
+from collections import deque
+
+# Paper console lines the monitor understands. Every pattern is anchored on the
+# server thread's prefix and matches the whole message, so chat cannot fake them.
+SERVER_PREFIX = r"^\[[^\]]+\] \[Server thread/(?:INFO|WARN)\]: "
+FLOODGATE_PREFIX = '.'  # Prefix Geyser/Floodgate puts in front of Bedrock player names
+PLAYER_NAME = rf"((?:{re.escape(FLOODGATE_PREFIX)})?\w{{1,16}})"
+CANT_KEEP_UP_RE = re.compile(SERVER_PREFIX + r"Can't keep up! Is the server overloaded\? Running (\d+)ms or (\d+) ticks behind$")
+JOINED_RE = re.compile(SERVER_PREFIX + PLAYER_NAME + r" joined the game$")
+LEFT_RE = re.compile(SERVER_PREFIX + PLAYER_NAME + r" left the game$")
+PLAYER_LIST_RE = re.compile(SERVER_PREFIX + r"There are \d+ of a max of \d+ players online:(.*)$")
+TPS_RE = re.compile(SERVER_PREFIX + r"TPS from last 1m, 5m, 15m: \*?([\d.]+), \*?([\d.]+), \*?([\d.]+)$")
+MSPT_HEADER_RE = re.compile(SERVER_PREFIX + r"Server tick times \(avg/min/max\) from last 5s, 10s, 1m:$")
+MSPT_RE = re.compile(SERVER_PREFIX + r"\S* ?([\d.]+)/[\d.]+/[\d.]+, [\d.]+/[\d.]+/[\d.]+, [\d.]+/[\d.]+/[\d.]+$")
+SERVER_DONE_RE = re.compile(SERVER_PREFIX + r'Done \([\d.,]+s\)! For help, type "help"$')
+SERVER_STOPPING_RE = re.compile(SERVER_PREFIX + r"Stopping server$")
+COLOUR_CODE_RE = re.compile(r"\x1b\[[0-9;]*m|§.")
+
+HISTORY_SIZE = 60  # Samples kept per rolling window
+LAG_SPIKE_HISTORY_SIZE = 20
+MAX_LINE_LENGTH = 8192
+READ_SIZE = 64 * 1024
+
+TPS_ALERT_THRESHOLD = 15.0
+ALERT_COOLDOWN_SECONDS = 300
+
+class ServerHealth:
+    """
+    Rolling view of server health built one console line at a time.
+
+    Every window is a fixed-size deque, so memory use does not grow with the
+    length of the log.
+    """
+    def __init__(self, alert_cooldown=ALERT_COOLDOWN_SECONDS):
+        self.tps = deque(maxlen=HISTORY_SIZE)
+        self.mspt = deque(maxlen=HISTORY_SIZE)
+        self.lag_spikes = deque(maxlen=LAG_SPIKE_HISTORY_SIZE)
+        self.lag_spikes_per_minute = deque(maxlen=60)  # [minute, count] for the last hour
+        self.players = set()
+        self.alert_cooldown = alert_cooldown
+        self.last_alert = {}
+        self.suppressed = {}
+        self.expect_mspt = False
+
+    def feed_line(self, line, now=None):
+        """
+        Updates the health state from one console line.
+
+        Args:
+            line (str): The log line, without the trailing newline.
+            now (float or None): The time the line was read (defaults to time.time()).
+
+        Returns:
+            str or None: An alert message if the line should be reported to the channel.
+        """
+        now = time.time() if now is None else now
+        line = COLOUR_CODE_RE.sub('', line)
+
+        if self.expect_mspt:
+            self.expect_mspt = False
+            match = MSPT_RE.search(line)
+            if match:
+                self.mspt.append((now, float(match.group(1))))
+                return None
+
+        match = CANT_KEEP_UP_RE.search(line)
+        if match:
+            behind_ms, ticks = int(match.group(1)), int(match.group(2))
+            self.lag_spikes.append((now, behind_ms, ticks))
+            minute = int(now // 60)
+            if self.lag_spikes_per_minute and self.lag_spikes_per_minute[-1][0] == minute:
+                self.lag_spikes_per_minute[-1][1] += 1
+            else:
+                self.lag_spikes_per_minute.append([minute, 1])
+            return self.debounce('lag', now, f'Lag spike: server is running {behind_ms}ms ({ticks} ticks) behind.')
+
+        match = JOINED_RE.search(line)
+        if match:
+            self.players.add(match.group(1))
+            return None
+
+        match = LEFT_RE.search(line)
+        if match:
+            self.players.discard(match.group(1))
+            return None
+
+        match = PLAYER_LIST_RE.search(line)
+        if match:
+            # The answer to 'list' replaces whatever was pieced together from joins and leaves
+            names = [name.strip() for name in match.group(1).split(',')]
+            self.players = {name for name in names if name}
+            return None
+
+        match = TPS_RE.search(line)
+        if match:
+            tps = float(match.group(1))
+            self.tps.append((now, tps))
+            if tps < TPS_ALERT_THRESHOLD:
+                return self.debounce('tps', now, f'Low TPS: {tps:.1f} over the last minute.')
+            return None
+
+        if MSPT_HEADER_RE.search(line):
+            self.expect_mspt = True
+        elif SERVER_DONE_RE.search(line) or SERVER_STOPPING_RE.search(line):
+            self.players.clear()
+        return None
+
+    def debounce(self, kind, now, message):
+        """
+        Lets an alert through at most once per cooldown for each kind of alert.
+
+        Args:
+            kind (str): The alert kind, e.g. 'lag' or 'tps'.
+            now (float): The current time.
+            message (str): The alert message.
+
+        Returns:
+            str or None: The message, with a count of suppressed alerts, or None if still cooling down.
+        """
+        if now - self.last_alert.get(kind, float('-inf')) < self.alert_cooldown:
+            self.suppressed[kind] = self.suppressed.get(kind, 0) + 1
+            return None
+
+        self.last_alert[kind] = now
+        suppressed = self.suppressed.pop(kind, 0)
+        if suppressed:
+            message += f' ({suppressed} similar alert{"s" if suppressed != 1 else ""} suppressed)'
+        return message
+
+    def summary(self, now=None):
+        """
+        Builds the /health message.
+
+        Args:
+            now (float or None): The current time (defaults to time.time()).
+
+        Returns:
+            str: A summary of TPS, MSPT, recent lag spikes and online players.
+        """
+        now = time.time() if now is None else now
+        lines = ['**Server health** :\n']
+
+        if self.tps:
+            average = sum(tps for _, tps in self.tps) / len(self.tps)
+            lines.append(f'TPS : {self.tps[-1][1]:.1f} (average {average:.1f} over {len(self.tps)} samples)')
+        else:
+            lines.append('TPS : no data yet')
+
+        if self.mspt:
+            lines.append(f'MSPT : {self.mspt[-1][1]:.1f} (peak {max(mspt for _, mspt in self.mspt):.1f})')
+        else:
+            lines.append('MSPT : no data yet')
+
+        current_minute = int(now // 60)
+        spike_count = sum(count for minute, count in self.lag_spikes_per_minute if current_minute - minute < 60)
+        lines.append(f'Lag spikes in the last hour : {spike_count}')
+        recent = [spike for spike in self.lag_spikes if now - spike[0] <= 3600]
+        for when, behind_ms, ticks in recent[-5:]:
+            lines.append(f'\t{int((now - when) // 60)} minutes ago : {behind_ms}ms ({ticks} ticks) behind')
+
+        if self.players:
+            lines.append(f'Online players ({len(self.players)}) : ' + ', '.join(sorted(self.players)))
+        else:
+            lines.append('Online players : none')
+        return '\n'.join(lines)
+
+class LogTailer:
+    """
+    Follows a log file by byte offset, surviving rotation, without re-reading old data.
+    """
+    def __init__(self, path, from_start=False):
+        self.path = path
+        self.from_start = from_start
+        self.file = None
+        self.inode = None
+        self.partial = b''
+        self.discarding = False  # Skipping the rest of an overlong line
+
+    def open(self):
+        try:
+            self.file = open(self.path, 'rb')
+        except FileNotFoundError:
+            # A log that appears later is new, so read it from the beginning
+            self.file = None
+            self.from_start = True
+            return
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        if not self.from_start:
+            self.file.seek(0, os.SEEK_END)
+        # Files opened after a rotation are always read from the beginning
+        self.from_start = True
+
+    def read_lines(self):
+        """
+        Yields the lines written since the last call, one read buffer at a time.
+
+        Yields:
+            str: Complete new lines, decoded and without line endings.
+        """
+        if self.file is None:
+            self.open()
+            if self.file is None:
+                return
+
+        yield from self._drain()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+
+        if stat.st_ino != self.inode or stat.st_size < self.file.tell():
+            # latest.log was rotated or truncated: finish the old handle, then start on the new file
+            yield from self._drain()
+            if self.partial:
+                yield self.partial.decode('utf-8', 'replace')
+                self.partial = b''
+            self.discarding = False
+            self.file.close()
+            self.file = None
+            self.open()
+            if self.file is not None:
+                yield from self._drain()
+
+    def _drain(self):
+        while True:
+            data = self.file.read(READ_SIZE)
+            if not data:
+                return
+            complete = (self.partial + data).split(b'\n')
+            self.partial = complete.pop()
+            if self.discarding:
+                if not complete:
+                    self.partial = b''
+                    continue
+                # The first piece is the end of the overlong line
+                complete.pop(0)
+                self.discarding = False
+            # Guard against a runaway line without a newline
+            if len(self.partial) > MAX_LINE_LENGTH:
+                self.partial = b''
+                self.discarding = True
+            for line in complete:
+                yield line.rstrip(b'\r').decode('utf-8', 'replace')
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+# Function to follow the server log and feed it into a ServerHealth
+async def monitor_server_log(path, health, on_alert, poll_seconds=1.0, from_start=False):
+    """
+    Tails the server log forever, updating health and awaiting on_alert for each alert.
+
+    Args:
+        path (str): Path to logs/latest.log.
+        health (ServerHealth): The health state to update.
+        on_alert (coroutine function): Called with each alert message.
+        poll_seconds (float): Seconds between checks for new data.
+        from_start (bool): Read the existing log instead of starting at its end.
+    """
+    tailer = LogTailer(path, from_start=from_start)
+    try:
+        while True:
+            # Log and keep tailing, so one bad line or an unreadable file does not stop the monitor
+            try:
+                for count, line in enumerate(tailer.read_lines(), 1):
+                    alert = health.feed_line(line)
+                    if alert:
+                        await on_alert(alert)
+                    # Let other tasks run while catching up on a long log
+                    if count % 1000 == 0:
+                        await asyncio.sleep(0)
+            except Exception as e:
+                print(f"Error while reading the server log: {e}")
+            await asyncio.sleep(poll_seconds)
+    finally:
+        tailer.close()
@@ -0,0 +1,138 @@
+import asyncio
+import os
+
+import server_health
+
+RECORDED_LOG = [
+    '[10:00:00] [Server thread/INFO]: Done (5.21s)! For help, type "help"',
+    '[10:00:01] [Server thread/INFO]: Steve joined the game',
+    '[10:00:02] [Server thread/INFO]: Alex joined the game',
+    "[10:00:03] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running 2534ms or 50 ticks behind",
+    '[10:00:04] [Server thread/INFO]: TPS from last 1m, 5m, 15m: *12.5, 19.9, 20.0',
+    '[10:00:05] [Server thread/INFO]: Server tick times (avg/min/max) from last 5s, 10s, 1m:',
+    '[10:00:05] [Server thread/INFO]: ◴ 42.1/3.0/80.2, 40.0/2.0/90.0, 30.0/1.0/99.0',
+]
+
+SPOOFED_CHAT = [
+    "[10:01:00] [Async Chat Thread - #0/INFO]: <Steve> Can't keep up! Is the server overloaded? Running 99999ms or 2000 ticks behind",
+    '[10:01:01] [Async Chat Thread - #0/INFO]: <Steve> ]: Herobrine joined the game',
+    '[10:01:02] [Async Chat Thread - #0/INFO]: <Steve> Done (1.0s)! For help, type "help"',
+    '[10:01:03] [Async Chat Thread - #0/INFO]: <Steve> Stopping server',
+    '[10:01:04] [Async Chat Thread - #0/INFO]: <Steve> TPS from last 1m, 5m, 15m: 1.0, 1.0, 1.0',
+    "[10:01:05] [Server thread/INFO]: [Steve] Can't keep up! Is the server overloaded? Running 99999ms or 2000 ticks behind",
+]
+
+def write(path, text, mode='a'):
+    with open(path, mode) as file:
+        file.write(text)
+
+def replay(tailer, health, alerts):
+    for line in tailer.read_lines():
+        alert = health.feed_line(line, now=1000.0)
+        if alert:
+            alerts.append(alert)
+
+def test_replay_with_partial_lines_and_rotation(tmp_path):
+    log = tmp_path / 'latest.log'
+    write(log, '', 'w')
+    tailer = server_health.LogTailer(str(log))
+    assert list(tailer.read_lines()) == []
+    health = server_health.ServerHealth()
+    alerts = []
+
+    write(log, '\n'.join(RECORDED_LOG) + '\n')
+    write(log, '[10:00:06] [Server thread/INFO]: Steve left the ga')
+    replay(tailer, health, alerts)
+    assert health.players == {'Steve', 'Alex'}
+
+    write(log, 'me\n')
+    replay(tailer, health, alerts)
+    assert health.players == {'Alex'}
+
+    # Paper renames latest.log on rotation; lines written to the old file before then are still read
+    os.rename(log, tmp_path / 'old.log')
+    write(tmp_path / 'old.log', '[10:00:07] [Server thread/INFO]: Bob joined the game\n')
+    write(log, '[11:00:00] [Server thread/INFO]: Carl joined the game\n', 'w')
+    replay(tailer, health, alerts)
+    tailer.close()
+
+    assert health.players == {'Alex', 'Bob', 'Carl'}
+    assert [tps for _, tps in health.tps] == [12.5]
+    assert [mspt for _, mspt in health.mspt] == [42.1]
+    assert len(health.lag_spikes) == 1
+    assert alerts == ['Lag spike: server is running 2534ms (50 ticks) behind.', 'Low TPS: 12.5 over the last minute.']
+
+def test_overlong_line_is_dropped_whole(tmp_path):
+    log = tmp_path / 'latest.log'
+    write(log, '', 'w')
+    tailer = server_health.LogTailer(str(log))
+    assert list(tailer.read_lines()) == []
+
+    write(log, 'x' * (server_health.MAX_LINE_LENGTH + 1))
+    assert list(tailer.read_lines()) == []
+    write(log, 'x' * server_health.READ_SIZE + ' joined the game\n[10:00:00] [Server thread/INFO]: Steve joined the game\n')
+    assert list(tailer.read_lines()) == ['[10:00:00] [Server thread/INFO]: Steve joined the game']
+    tailer.close()
+
+def test_chat_cannot_spoof_server_lines():
+    health = server_health.ServerHealth()
+    health.feed_line('[10:00:00] [Server thread/INFO]: Steve joined the game')
+    alerts = [health.feed_line(line) for line in SPOOFED_CHAT]
+
+    assert alerts == [None] * len(SPOOFED_CHAT)
+    assert health.players == {'Steve'}
+    assert not health.lag_spikes and not health.tps
+
+def test_lag_spikes_in_the_last_hour_are_not_capped():
+    health = server_health.ServerHealth()
+    spike = "[10:00:00] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running 2100ms or 42 ticks behind"
+    for i in range(50):
+        health.feed_line(spike, now=i * 30.0)
+
+    assert 'Lag spikes in the last hour : 50' in health.summary(now=50 * 30.0)
+    assert 'Lag spikes in the last hour : 0' in health.summary(now=50 * 30.0 + 3600)
+
+def test_bedrock_players_and_player_list():
+    health = server_health.ServerHealth()
+    health.feed_line('[10:00:00] [Server thread/INFO]: .BedrockSteve joined the game')
+    health.feed_line('[10:00:01] [Server thread/INFO]: Alex joined the game')
+    assert health.players == {'.BedrockSteve', 'Alex'}
+    health.feed_line('[10:00:02] [Server thread/INFO]: .BedrockSteve left the game')
+    assert health.players == {'Alex'}
+
+    # Players already online when the monitor started only show up in the answer to 'list'
+    health.feed_line('[10:00:03] [Server thread/INFO]: There are 3 of a max of 20 players online: Alex, Steve, .Bedrock_Bob')
+    assert health.players == {'Alex', 'Steve', '.Bedrock_Bob'}
+    health.feed_line('[10:00:04] [Server thread/INFO]: There are 0 of a max of 20 players online: ')
+    assert health.players == set()
+    health.feed_line('[10:00:05] [Async Chat Thread - #0/INFO]: <Steve> There are 1 of a max of 20 players online: Herobrine')
+    assert health.players == set()
+
+def test_monitor_keeps_tailing_after_an_error(tmp_path, monkeypatch):
+    log = tmp_path / 'latest.log'
+    write(log, '', 'w')
+    health = server_health.ServerHealth()
+    feed_line = health.feed_line
+    calls = []
+
+    def flaky_feed_line(line, now=None):
+        calls.append(line)
+        if len(calls) == 1:
+            raise ValueError('bad line')
+        return feed_line(line, now)
+
+    monkeypatch.setattr(health, 'feed_line', flaky_feed_line)
+
+    async def run():
+        async def on_alert(message):
+            pass
+        task = asyncio.create_task(server_health.monitor_server_log(str(log), health, on_alert, poll_seconds=0.01))
+        await asyncio.sleep(0.05)
+        write(log, '[10:00:00] [Server thread/INFO]: Steve joined the game\n')
+        await asyncio.sleep(0.05)
+        write(log, '[10:00:01] [Server thread/INFO]: Alex joined the game\n')
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+    assert health.players == {'Alex'}
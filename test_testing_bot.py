@@ -0,0 +1,67 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import testing_bot
+
+class FakeResponse:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, content=None, **kwargs):
+        self.messages.append(content)
+
+class FakeInteraction:
+    def __init__(self):
+        self.response = FakeResponse()
+
+def run_command(name, **kwargs):
+    interaction = FakeInteraction()
+    asyncio.run(testing_bot.bot.tree.get_command(name).callback(interaction, **kwargs))
+    return interaction.response.messages[0]
+
+def write_coordinates(data):
+    with open(testing_bot.COORDS_FILE, 'w') as file:
+        json.dump(data, file)
+
+@pytest.fixture(autouse=True)
+def coordinates_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(testing_bot, 'location_index', testing_bot.LocationIndex())
+    write_coordinates({'nether': {'fortress': [1, 70, 1]}, 'overworld': {'bee farm': [2, 70, 2], 'cactus': [3, 70, 3]}})
+
+def test_discover_and_undiscover_update_locations():
+    assert run_command('locations', dimension='all') == 'All locations : \n\tBee farm\n\tCactus\n\tFortress'
+
+    run_command('discover', location='Apple', dimension='overworld', x='0', y='64', z='0')
+    assert run_command('locations', dimension='overworld') == 'Locations in Overworld: \n\tApple\n\tBee farm\n\tCactus'
+    assert run_command('locations', dimension='all') == 'All locations : \n\tApple\n\tBee farm\n\tCactus\n\tFortress'
+    assert run_command('locations', dimension='nether') == 'Locations in Nether: \n\tFortress'
+    with open(testing_bot.COORDS_FILE) as file:
+        assert list(json.load(file)['overworld']) == ['apple', 'bee farm', 'cactus']
+
+    run_command('undiscover', location='bee farm')
+    assert run_command('locations', dimension='all') == 'All locations : \n\tApple\n\tCactus\n\tFortress'
+
+def test_outside_edit_rebuilds_index_with_mixed_case_names():
+    run_command('locations', dimension='all')
+    write_coordinates({'nether': {}, 'overworld': {'apple': [0, 64, 0], 'Bee Farm': [2, 70, 2], 'cactus': [3, 70, 3]}})
+    # Make sure the edit is visible even on filesystems with coarse timestamps
+    os.utime(testing_bot.COORDS_FILE, ns=(0, 0))
+
+    run_command('undiscover', location='apple')
+    assert run_command('locations', dimension='overworld') == 'Locations in Overworld: \n\tBee farm\n\tCactus'
+
+    run_command('discover', location='aardvark', dimension='overworld', x='0', y='64', z='0')
+    assert run_command('locations', dimension='all') == 'All locations : \n\tAardvark\n\tBee farm\n\tCactus'
+    with open(testing_bot.COORDS_FILE) as file:
+        assert list(json.load(file)['overworld']) == ['aardvark', 'Bee Farm', 'cactus']
+
+def test_failed_write_leaves_index_unchanged(monkeypatch):
+    run_command('locations', dimension='all')
+    monkeypatch.setattr(testing_bot, 'write_coordinates_data', lambda data: False)
+
+    assert run_command('discover', location='ghost', dimension='overworld', x='0', y='64', z='0').startswith('Could not add')
+    assert 'Ghost' not in run_command('locations', dimension='all')
@@ -0,0 +1,111 @@
+import os
+
+import world_backup
+
+SECTOR = world_backup.REGION_SECTOR_SIZE
+
+def make_region(chunk_sectors):
+    """
+    Builds a region file with one random chunk per entry, each <sectors> long.
+    """
+    header = bytearray(world_backup.REGION_HEADER_SIZE)
+    body = b''
+    offset = world_backup.REGION_HEADER_SIZE // SECTOR
+    for index, sectors in enumerate(chunk_sectors):
+        header[index * 4:index * 4 + 3] = offset.to_bytes(3, 'big')
+        header[index * 4 + 3] = sectors
+        body += os.urandom(sectors * SECTOR)
+        offset += sectors
+    return bytes(header) + body
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+def read(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+def make_server(tmp_path):
+    server = tmp_path / 'server'
+    write(server / 'world' / 'region' / 'r.0.0.mca', make_region([2, 1, 3, 1]))
+    write(server / 'world' / 'level.dat', os.urandom(300 * 1024))
+    write(server / 'world_nether' / 'region' / 'r.0.0.mca', make_region([1, 1]))
+    return str(server), str(tmp_path / 'store')
+
+def count_chunks(store):
+    return sum(len(names) for _, _, names in os.walk(os.path.join(store, world_backup.CHUNKS_DIR)))
+
+def test_region_pieces_follow_chunk_boundaries(tmp_path):
+    path = tmp_path / 'r.0.0.mca'
+    data = make_region([2, 1, 3])
+    write(path, data)
+
+    pieces = list(world_backup.iter_region_pieces(str(path)))
+    assert [len(piece) for piece in pieces] == [world_backup.REGION_HEADER_SIZE, 2 * SECTOR, SECTOR, 3 * SECTOR]
+    assert b''.join(pieces) == data
+
+def test_snapshot_restore_round_trip(tmp_path):
+    server, store = make_server(tmp_path)
+    originals = {path: read(os.path.join(server, path)) for path in
+                 ['world/region/r.0.0.mca', 'world/level.dat', 'world_nether/region/r.0.0.mca']}
+
+    snapshot = world_backup.create_snapshot(store, server, ['world', 'world_nether'], workers=2)
+    write(os.path.join(server, 'world', 'level.dat'), b'changed after the backup')
+
+    assert world_backup.restore_snapshot(store, snapshot['id'], server)
+    for path, data in originals.items():
+        assert read(os.path.join(server, path)) == data
+    assert read(os.path.join(server, 'world.before-restore', 'level.dat')) == b'changed after the backup'
+    assert not world_backup.restore_snapshot(store, 'missing', server)
+
+def test_incremental_snapshot_stores_only_changed_chunks(tmp_path):
+    server, store = make_server(tmp_path)
+    first = world_backup.create_snapshot(store, server, ['world', 'world_nether'], workers=2)
+    chunks_before = count_chunks(store)
+
+    unchanged = world_backup.create_snapshot(store, server, ['world', 'world_nether'], workers=2)
+    assert unchanged['changed_files'] == 0 and unchanged['stored_bytes'] == 0
+
+    # Rewrite one Minecraft chunk and its header timestamp, as a save would
+    region = os.path.join(server, 'world', 'region', 'r.0.0.mca')
+    data = bytearray(read(region))
+    data[SECTOR + 4:SECTOR + 8] = b'\x00\x00\x00\x01'
+    data[4 * SECTOR:5 * SECTOR] = os.urandom(SECTOR)
+    write(region, bytes(data))
+
+    changed = world_backup.create_snapshot(store, server, ['world', 'world_nether'], workers=2)
+    assert changed['changed_files'] == 1
+    assert count_chunks(store) == chunks_before + 2  # the new header and the rewritten chunk
+    assert 0 < changed['stored_bytes'] < first['stored_bytes']
+
+def test_prune_keeps_referenced_chunks(tmp_path):
+    server, store = make_server(tmp_path)
+    old = world_backup.create_snapshot(store, server, ['world', 'world_nether'], workers=2)
+    write(os.path.join(server, 'world', 'level.dat'), os.urandom(300 * 1024))
+    new = world_backup.create_snapshot(store, server, ['world', 'world_nether'], workers=2)
+
+    # Age every chunk so the guard for chunks written during a prune does not apply
+    chunks_root = os.path.join(store, world_backup.CHUNKS_DIR)
+    for root, _, names in os.walk(chunks_root):
+        for name in names:
+            os.utime(os.path.join(root, name), (0, 0))
+
+    removed, deleted = world_backup.prune_snapshots(store, 1)
+    assert removed == [old['id']] and deleted > 0
+    assert world_backup.list_snapshots(store) == [new['id']]
+
+    os.rename(os.path.join(server, 'world'), os.path.join(server, 'world-live'))
+    assert world_backup.restore_snapshot(store, new['id'], server)
+    assert read(os.path.join(server, 'world', 'region', 'r.0.0.mca')) == read(os.path.join(server, 'world-live', 'region', 'r.0.0.mca'))
+
+def test_restore_with_world_missing_from_manifest(tmp_path):
+    server, store = make_server(tmp_path)
+    snapshot = world_backup.create_snapshot(store, server, ['world'], workers=2)
+    nether = read(os.path.join(server, 'world_nether', 'region', 'r.0.0.mca'))
+
+    assert world_backup.restore_snapshot(store, snapshot['id'], server)
+    # A world the snapshot did not cover is left exactly where it is
+    assert read(os.path.join(server, 'world_nether', 'region', 'r.0.0.mca')) == nether
+    assert not os.path.exists(os.path.join(server, 'world_nether.before-restore'))
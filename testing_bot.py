@@ -4,8 +4,9 @@ from discord import app_commands
 from discord.ext import commands
 from datetime import datetime
 import json
+import os
 import ujson
-from collections import OrderedDict
+from bisect import bisect_left, insort
 from fuzzywuzzy import fuzz
 
 # Replace these with your actual tokens
@@ -45,12 +46,140 @@ def write_coordinates_data(data):
 
     Args:
         data (dict): The location coordinates data to be written.
+
+    Returns:
+        bool: True if the data was written, False otherwise.
     """
     try:
         with open(COORDS_FILE, 'w') as file:
             ujson.dump(data, file, indent=4)
+        return True
     except Exception as e:
         print(f"Error while writing to the JSON file: {e}")
+        return False
+
+class LocationIndex:
+    """
+    Sorted location names per dimension and merged, with the /locations text cached.
+
+    The index remembers which version of the JSON file it was built from so an
+    outside edit to the file triggers a rebuild on the next lookup.
+    """
+    DIMENSIONS = ['nether', 'overworld']
+    HEADERS = {
+        'all': 'All locations : ',
+        'nether': 'Locations in Nether: ',
+        'overworld': 'Locations in Overworld: ',
+    }
+
+    def __init__(self):
+        self.names = {dimension: [] for dimension in self.DIMENSIONS}
+        self.all_names = []
+        self.rendered = {}
+        self.file_version = None
+
+    def load(self, data, file_version):
+        """
+        Rebuilds the index from the location coordinates data.
+
+        Args:
+            data (dict): The location coordinates data.
+            file_version (tuple or None): The version of the JSON file the data came from.
+        """
+        self.names = {dimension: sorted(data.get(dimension, {}), key=str.lower) for dimension in self.DIMENSIONS}
+        self.all_names = sorted(self.names['nether'] + self.names['overworld'], key=str.lower)
+        self.rendered = {}
+        self.file_version = file_version
+
+    def position(self, dimension, name):
+        """
+        Finds where a location name belongs in a dimension's sorted list.
+
+        Args:
+            dimension (str): The dimension of the location (nether or overworld).
+            name (str): The location name.
+
+        Returns:
+            int: The index the name would be inserted at.
+        """
+        return bisect_left(self.names[dimension], name.lower(), key=str.lower)
+
+    def add(self, dimension, name):
+        """
+        Inserts a location name, keeping the dimension and merged lists sorted.
+
+        Args:
+            dimension (str): The dimension of the location (nether or overworld).
+            name (str): The location name.
+        """
+        insort(self.names[dimension], name, key=str.lower)
+        insort(self.all_names, name, key=str.lower)
+        self.rendered.pop(dimension, None)
+        self.rendered.pop('all', None)
+
+    def remove(self, dimension, name):
+        """
+        Removes a location name from the dimension and merged lists.
+
+        Args:
+            dimension (str): The dimension of the location (nether or overworld).
+            name (str): The location name.
+        """
+        for names in (self.names.get(dimension, []), self.all_names):
+            # Names that differ only in case sort together, so look through all of them
+            i = bisect_left(names, name.lower(), key=str.lower)
+            while i < len(names) and names[i].lower() == name.lower():
+                if names[i] == name:
+                    del names[i]
+                    break
+                i += 1
+        self.rendered.pop(dimension, None)
+        self.rendered.pop('all', None)
+
+    def render(self, dimension):
+        """
+        Returns the /locations message for a dimension, rendering it only if the cache is stale.
+
+        Args:
+            dimension (str): all, nether or overworld.
+
+        Returns:
+            str: The message listing the locations.
+        """
+        if dimension not in self.rendered:
+            names = self.all_names if dimension == 'all' else self.names[dimension]
+            locations = '\n\t'.join([place.capitalize() for place in names])
+            self.rendered[dimension] = f'{self.HEADERS[dimension]}\n\t{locations}'
+        return self.rendered[dimension]
+
+location_index = LocationIndex()
+
+# Function to get the version of the JSON file
+def coordinates_file_version():
+    """
+    Gets a cheap version stamp for the location coordinates JSON file.
+
+    Returns:
+        tuple or None: The modification time and size of the file, or None if it does not exist.
+    """
+    try:
+        stat = os.stat(COORDS_FILE)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+# Function to get the location index, rebuilding it if the JSON file changed
+def get_location_index():
+    """
+    Returns the location index, reloading it if the JSON file changed outside the bot.
+
+    Returns:
+        LocationIndex: The up to date location index.
+    """
+    file_version = coordinates_file_version()
+    if location_index.file_version is None or file_version != location_index.file_version:
+        location_index.load(read_coordinates_data(), file_version)
+    return location_index
 
 # Function to validate and convert coordinates to integers
 def validate_coordinate(coord_str):
@@ -195,27 +324,10 @@ async def list_locations(interaction: discord.Interaction, dimension: str):
         interaction (discord.Interaction): The interaction object for the command.
         dimension (str): The dimension to list locations for (all, nether, or overworld).
     """
-    data = read_coordinates_data()
+    dimension = dimension.lower()
 
-    if dimension.lower() == 'all':
-        # Combine and sort locations from 'nether' and 'overworld'
-        nether_locations = data.get('nether', {}).keys()
-        overworld_locations = data.get('overworld', {}).keys()
-        all_locations = sorted(list(nether_locations) + list(overworld_locations), key=str.lower)
-        locations = '\n\t'.join([place.capitalize() for place in all_locations])
-        await interaction.response.send_message(f'All locations : \n\t{locations}', ephemeral=True)
-
-    elif dimension.lower() == 'nether':
-        locations = data.get('nether', {}).keys()
-        locations = sorted(locations, key=str.lower)
-        locations = '\n\t'.join([place.capitalize() for place in locations])
-        await interaction.response.send_message(f'Locations in Nether: \n\t{locations}', ephemeral=True)
-
-    elif dimension.lower() == 'overworld':
-        locations = data.get('overworld', {}).keys()
-        locations = sorted(locations, key=str.lower)
-        locations = '\n\t'.join([place.capitalize() for place in locations])
-        await interaction.response.send_message(f'Locations in Overworld: \n\t{locations}', ephemeral=True)
+    if dimension in ['all', 'nether', 'overworld']:
+        await interaction.response.send_message(get_location_index().render(dimension), ephemeral=True)
     else:
         await interaction.response.send_message('Invalid dimension. Use Nether, Overworld or All.', ephemeral=True)
 
@@ -254,12 +366,17 @@ async def undiscover(interaction: discord.Interaction, location: str):
         interaction (discord.Interaction): The interaction object for the command.
         location (str): The name of the location to be deleted.
     """
+    index = get_location_index()
     data = read_coordinates_data()
     location_lower = location.lower()
     for dimension, locations in data.items():
         if location_lower in locations:
             del locations[location_lower]
-            write_coordinates_data(data)
+            if not write_coordinates_data(data):
+                await interaction.response.send_message(f'Could not delete {location.capitalize()}. Please try again.', ephemeral=True)
+                return
+            index.remove(dimension, location_lower)
+            index.file_version = coordinates_file_version()
             await interaction.response.send_message(f'Location {location.capitalize()} deleted from {dimension.capitalize()}.')
             return
 
@@ -305,6 +422,7 @@ async def discover(interaction: discord.Interaction, location: str, dimension: s
         await interaction.response.send_message('Invalid X or Z-coordinate. Coordinates should be between -100,000 and 100,000.', ephemeral=True)
         return
 
+    index = get_location_index()
     data = read_coordinates_data()
 
     if location_lower in data["nether"] or location_lower in data["overworld"]:
@@ -316,17 +434,18 @@ async def discover(interaction: discord.Interaction, location: str, dimension: s
         # Update the data with the new location
         dimension_data[location_lower] = [x_coord, y_coord, z_coord]
 
-        # Sort the locations alphabetically
-        sorted_locations = sorted(dimension_data.items(), key=lambda item: item[0].lower())
+        # Keep the file alphabetical by slotting the new name into the index's order
+        names = index.names[dimension]
+        position = index.position(dimension, location_lower)
+        ordered_names = names[:position] + [location_lower] + names[position:]
+        data[dimension] = {name: dimension_data[name] for name in ordered_names}
 
-        # Create a new ordered dictionary to preserve insertion order
-        ordered_dimension_data = OrderedDict(sorted_locations)
-
-        # Update the original dictionary with the ordered dictionary
-        data[dimension] = ordered_dimension_data
-
-        # Write the updated data to the JSON file
-        write_coordinates_data(data)
+        # Write the updated data to the JSON file, and only then to the index
+        if not write_coordinates_data(data):
+            await interaction.response.send_message(f'Could not add {location.capitalize()}. Please try again.', ephemeral=True)
+            return
+        index.add(dimension, location_lower)
+        index.file_version = coordinates_file_version()
 
         await interaction.response.send_message(f'Location {location.capitalize()} added to {dimension.capitalize()} with coordinates {x_coord}, {y_coord}, {z_coord}.')
 
@@ -626,4 +745,5 @@ async def coolest(interaction: discord.Interaction):
     """Who is the coolest player?"""
     await interaction.response.send_message('Alex is the coolest')
 
-bot.run(TOKEN)
+if __name__ == '__main__':
+    bot.run(TOKEN)
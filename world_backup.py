@@ -0,0 +1,379 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# Content-defined chunking parameters: boundaries land where the rolling hash
+# matches MASK, so an edit only changes the chunks around it.
+MIN_CHUNK_SIZE = 16 * 1024
+MAX_CHUNK_SIZE = 256 * 1024
+CHUNK_MASK = (1 << 16) - 1  # ~64 KiB average chunk
+READ_SIZE = 1024 * 1024
+COMPRESSION_LEVEL = 6
+
+# Region (.mca) files are split along their own layout instead: an 8 KiB header
+# followed by per-chunk blocks aligned to 4 KiB sectors. The blocks are already
+# zlib-compressed by the server, so they are stored without compressing again.
+REGION_SECTOR_SIZE = 4096
+REGION_HEADER_SIZE = 2 * REGION_SECTOR_SIZE
+REGION_COMPRESSION_LEVEL = 0
+
+# Fixed gear table so the same bytes always chunk the same way
+_rng = random.Random(0x6E6F6F646C65)
+GEAR = [_rng.getrandbits(32) for _ in range(256)]
+
+CHUNKS_DIR = 'chunks'
+SNAPSHOTS_DIR = 'snapshots'
+
+# Function to find the end of the next chunk in a buffer
+def find_boundary(buffer, start, eof):
+    """
+    Finds where the chunk starting at <start> ends using a gear rolling hash.
+
+    Args:
+        buffer (bytes): The buffered file data.
+        start (int): The offset of the chunk boundary in the buffer.
+        eof (bool): Whether the buffer holds the rest of the file.
+
+    Returns:
+        int or None: The length of the chunk, or None if more data is needed.
+    """
+    length = len(buffer) - start
+    if length < MAX_CHUNK_SIZE and not eof:
+        return None
+    if length <= MIN_CHUNK_SIZE:
+        return length
+
+    end = min(length, MAX_CHUNK_SIZE)
+    gear = GEAR
+    mask = CHUNK_MASK
+    h = 0
+    i = MIN_CHUNK_SIZE
+    for byte in buffer[start + MIN_CHUNK_SIZE:start + end]:
+        i += 1
+        h = ((h << 1) + gear[byte]) & 0xFFFFFFFF
+        if not h & mask:
+            return i
+    return end
+
+# Function to split a file into content-defined chunks without loading it whole
+def iter_chunks(path):
+    """
+    Streams a file and yields its content-defined chunks.
+
+    Args:
+        path (str): The file to split.
+
+    Yields:
+        memoryview: Consecutive chunks of the file.
+    """
+    buffer = b''
+    pos = 0
+    eof = False
+    with open(path, 'rb') as file:
+        while True:
+            # Only compact the buffer when refilling it, not on every cut
+            if not eof and len(buffer) - pos < MAX_CHUNK_SIZE:
+                data = file.read(READ_SIZE)
+                if data:
+                    buffer = buffer[pos:] + data
+                    pos = 0
+                else:
+                    eof = True
+                continue
+            if pos >= len(buffer):
+                return
+            cut = find_boundary(buffer, pos, eof)
+            yield memoryview(buffer)[pos:pos + cut]
+            pos += cut
+
+# Function to split a region file at its chunk boundaries
+def iter_region_pieces(path):
+    """
+    Streams a region file as its header followed by one piece per Minecraft chunk.
+
+    The boundaries come from the location table in the header, so no per-byte
+    hashing is needed to find them.
+
+    Args:
+        path (str): The .mca file to split.
+
+    Yields:
+        bytes: Consecutive pieces of the file.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        header = file.read(REGION_HEADER_SIZE)
+        if len(header) < REGION_HEADER_SIZE:
+            if header:
+                yield header
+            return
+
+        # Each location entry is a 3-byte sector offset and a 1-byte sector count
+        cuts = {REGION_HEADER_SIZE, size}
+        for entry in range(0, REGION_SECTOR_SIZE, 4):
+            offset = int.from_bytes(header[entry:entry + 3], 'big') * REGION_SECTOR_SIZE
+            if REGION_HEADER_SIZE < offset < size:
+                cuts.add(offset)
+
+        yield header
+        position = REGION_HEADER_SIZE
+        for cut in sorted(cuts):
+            if cut > position:
+                yield file.read(cut - position)
+                position = cut
+
+def chunk_path(store_dir, digest):
+    return os.path.join(store_dir, CHUNKS_DIR, digest[:2], digest)
+
+# Function run in the worker pool: chunk, hash and store one file
+def store_file(store_dir, path):
+    """
+    Chunks a file and writes every chunk not already in the store, compressed.
+
+    The file is streamed straight from the world directory; nothing is staged.
+
+    Args:
+        store_dir (str): The backup store directory.
+        path (str): The file to back up.
+
+    Returns:
+        tuple: The list of [digest, size] pairs for the file and the number of new bytes stored.
+    """
+    if path.endswith('.mca'):
+        pieces, level = iter_region_pieces(path), REGION_COMPRESSION_LEVEL
+    else:
+        pieces, level = iter_chunks(path), COMPRESSION_LEVEL
+
+    chunks = []
+    stored_bytes = 0
+    for chunk in pieces:
+        digest = hashlib.sha256(chunk).hexdigest()
+        chunks.append([digest, len(chunk)])
+        target = chunk_path(store_dir, digest)
+        if os.path.exists(target):
+            # Refresh the mtime so a prune running alongside treats the chunk as in use
+            os.utime(target)
+            continue
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        compressed = zlib.compress(chunk, level)
+        # Write under a unique name first so a crash or a parallel worker never leaves a torn chunk
+        temp_path = f'{target}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(compressed)
+        os.replace(temp_path, target)
+        stored_bytes += len(compressed)
+    return chunks, stored_bytes
+
+def snapshot_path(store_dir, snapshot_id):
+    return os.path.join(store_dir, SNAPSHOTS_DIR, f'{snapshot_id}.json')
+
+# Function to read a snapshot manifest
+def read_snapshot(store_dir, snapshot_id):
+    """
+    Reads a snapshot manifest from the store.
+
+    Args:
+        store_dir (str): The backup store directory.
+        snapshot_id (str): The snapshot to read.
+
+    Returns:
+        dict or None: The manifest, or None if the snapshot does not exist.
+    """
+    try:
+        with open(snapshot_path(store_dir, snapshot_id), 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+# Function to list snapshot ids, oldest first
+def list_snapshots(store_dir):
+    """
+    Lists the snapshots in the store.
+
+    Args:
+        store_dir (str): The backup store directory.
+
+    Returns:
+        list: Snapshot ids sorted from oldest to newest.
+    """
+    try:
+        names = os.listdir(os.path.join(store_dir, SNAPSHOTS_DIR))
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len('.json')] for name in names if name.endswith('.json'))
+
+def _walk_files(server_dir, world_dirs):
+    for world in world_dirs:
+        for root, _, files in os.walk(os.path.join(server_dir, world)):
+            for name in files:
+                # session.lock is held open by the server and is recreated on start
+                if name == 'session.lock':
+                    continue
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, server_dir), path
+
+# Function to back up the world directories into the store
+def create_snapshot(store_dir, server_dir, world_dirs, workers=None):
+    """
+    Creates a new snapshot of the world directories.
+
+    Files whose size and modification time match the newest snapshot reuse its
+    chunk list without being read. Changed files are streamed into the store by
+    a process pool, and only chunks missing from the store are written, so the
+    cost of a repeat backup follows the amount of changed data.
+
+    Args:
+        store_dir (str): The backup store directory.
+        server_dir (str): The Minecraft server directory.
+        world_dirs (list): World directory names relative to server_dir.
+        workers (int or None): Number of worker processes (defaults to the CPU count).
+
+    Returns:
+        dict: The snapshot id and statistics about the run.
+    """
+    os.makedirs(os.path.join(store_dir, SNAPSHOTS_DIR), exist_ok=True)
+    os.makedirs(os.path.join(store_dir, CHUNKS_DIR), exist_ok=True)
+
+    snapshots = list_snapshots(store_dir)
+    previous = read_snapshot(store_dir, snapshots[-1]) if snapshots else None
+    previous_files = previous['files'] if previous else {}
+
+    files = {}
+    changed = []
+    for relative, path in _walk_files(server_dir, world_dirs):
+        stat = os.stat(path)
+        entry = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        old = previous_files.get(relative)
+        if old and old['size'] == entry['size'] and old['mtime'] == entry['mtime']:
+            entry['chunks'] = old['chunks']
+        else:
+            changed.append((relative, path))
+        files[relative] = entry
+
+    stored_bytes = 0
+    if changed:
+        # Spawned workers only import this module, never the bot that called it
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {relative: pool.submit(store_file, store_dir, path) for relative, path in changed}
+            for relative, future in futures.items():
+                chunks, new_bytes = future.result()
+                files[relative]['chunks'] = chunks
+                stored_bytes += new_bytes
+
+    snapshot_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+    suffix = 1
+    while os.path.exists(snapshot_path(store_dir, snapshot_id)):
+        snapshot_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix:02d}"
+        suffix += 1
+
+    manifest = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'worlds': list(world_dirs),
+        'files': files,
+    }
+    temp_path = snapshot_path(store_dir, snapshot_id) + '.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(manifest, file)
+    os.replace(temp_path, snapshot_path(store_dir, snapshot_id))
+
+    return {
+        'id': snapshot_id,
+        'files': len(files),
+        'changed_files': len(changed),
+        'total_bytes': sum(entry['size'] for entry in files.values()),
+        'stored_bytes': stored_bytes,
+    }
+
+# Function to delete old snapshots and the chunks only they referenced
+def prune_snapshots(store_dir, keep):
+    """
+    Keeps the newest <keep> snapshots and removes unreferenced chunks.
+
+    Chunks written or reused after the prune started are kept even if no
+    manifest lists them yet, in case a backup is still running.
+
+    Args:
+        store_dir (str): The backup store directory.
+        keep (int): The number of snapshots to keep.
+
+    Returns:
+        tuple: The removed snapshot ids and the number of chunks deleted.
+    """
+    started = time.time()
+    snapshots = list_snapshots(store_dir)
+    removed = snapshots[:-keep] if keep > 0 else snapshots
+    for snapshot_id in removed:
+        os.remove(snapshot_path(store_dir, snapshot_id))
+
+    referenced = set()
+    for snapshot_id in list_snapshots(store_dir):
+        for entry in read_snapshot(store_dir, snapshot_id)['files'].values():
+            referenced.update(digest for digest, _ in entry['chunks'])
+
+    deleted_chunks = 0
+    chunks_root = os.path.join(store_dir, CHUNKS_DIR)
+    for root, _, names in os.walk(chunks_root):
+        for name in names:
+            if name in referenced:
+                continue
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime >= started:
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            deleted_chunks += 1
+    return removed, deleted_chunks
+
+# Function to rebuild the world directories from a snapshot
+def restore_snapshot(store_dir, snapshot_id, server_dir):
+    """
+    Restores a snapshot into the server directory.
+
+    The worlds are rebuilt in a staging directory first; the current worlds are
+    then moved aside to <world>.before-restore and the restored ones moved in.
+    The server must be stopped while this runs.
+
+    Args:
+        store_dir (str): The backup store directory.
+        snapshot_id (str): The snapshot to restore.
+        server_dir (str): The Minecraft server directory.
+
+    Returns:
+        bool: True if the snapshot was restored, False if it does not exist.
+    """
+    manifest = read_snapshot(store_dir, snapshot_id)
+    if manifest is None:
+        return False
+
+    staging_dir = os.path.join(server_dir, f'.restore-{snapshot_id}')
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    for relative, entry in manifest['files'].items():
+        target = os.path.join(staging_dir, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as out:
+            for digest, _ in entry['chunks']:
+                with open(chunk_path(store_dir, digest), 'rb') as file:
+                    out.write(zlib.decompress(file.read()))
+        os.utime(target, ns=(entry['mtime'], entry['mtime']))
+
+    for world in manifest['worlds']:
+        current = os.path.join(server_dir, world)
+        aside = f'{current}.before-restore'
+        if os.path.exists(current):
+            shutil.rmtree(aside, ignore_errors=True)
+            os.replace(current, aside)
+        staged = os.path.join(staging_dir, world)
+        if os.path.exists(staged):
+            os.replace(staged, current)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    return True